@@ -0,0 +1,66 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from ingestao import ler_csv
+
+# %% Funções
+
+# Gera um arquivo transacoes.csv sintético com o mesmo formato do original, em lotes
+def gerar_transacoes(caminho, num_linhas, lote=1_000_000):
+    rng = np.random.default_rng(0)
+    nomes = np.array(['Pix - Recebido', 'Pix - Realizado', 'TED - Recebido', 'Compra Débito', 'Saque',
+                      'Pagamento de boleto', 'Transferência entre CC - Crédito', 'Compra Crédito'])
+    inicio = pd.Timestamp('2010-01-01')
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        f.write('cod_transacao,num_conta,data_transacao,nome_transacao,valor_transacao\n')
+        for deslocamento in range(0, num_linhas, lote):
+            n = min(lote, num_linhas - deslocamento)
+            segundos = rng.integers(0, 13 * 365 * 86400, n)
+            pd.DataFrame({
+                'cod_transacao': np.arange(deslocamento, deslocamento + n),
+                'num_conta': rng.integers(1, 1000, n),
+                'data_transacao': (inicio + pd.to_timedelta(segundos, unit='s')).strftime('%Y-%m-%d %H:%M:%S') + ' UTC',
+                'nome_transacao': rng.choice(nomes, n),
+                'valor_transacao': rng.normal(0, 1000, n).round(2),
+            }).to_csv(f, header=False, index=False)
+
+# Leitura anterior: read_csv em uma thread e conversão de datas linha a linha
+def leitura_atual(diretorio):
+    transacoes = pd.read_csv(os.path.join(diretorio, 'transacoes.csv'))
+    transacoes['ano_mes_transacao'] = transacoes['data_transacao'].apply(
+        lambda data: pd.to_datetime(data, errors='coerce').strftime('%Y-%m') if pd.notna(data) else None)
+    return transacoes
+
+# Nova leitura: pyarrow multi-thread com conversão nativa das datas
+def leitura_nova(diretorio):
+    transacoes = ler_csv('transacoes', diretorio)
+    transacoes['ano_mes_transacao'] = transacoes['data_transacao'].dt.strftime('%Y-%m')
+    return transacoes
+
+def cronometrar(funcao, diretorio):
+    inicio = time.perf_counter()
+    resultado = funcao(diretorio)
+    return time.perf_counter() - inicio, len(resultado)
+
+# %% Execução
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara a leitura de transacoes.csv com read_csv e com pyarrow.')
+    parser.add_argument('diretorio', nargs='?', default='.', help='Diretório que contém transacoes.csv')
+    parser.add_argument('--gerar', type=int, metavar='LINHAS',
+                        help='Gera um transacoes.csv sintético com o número de linhas informado antes de medir')
+    args = parser.parse_args()
+
+    caminho = os.path.join(args.diretorio, 'transacoes.csv')
+    if args.gerar:
+        gerar_transacoes(caminho, args.gerar)
+    tamanho_mb = os.path.getsize(caminho) / 1024 ** 2
+
+    tempo_novo, linhas = cronometrar(leitura_nova, args.diretorio)
+    tempo_atual, _ = cronometrar(leitura_atual, args.diretorio)
+    print(f"Arquivo: {caminho} ({tamanho_mb:.1f} MB, {linhas} linhas)")
+    print(f"read_csv + datas linha a linha: {tempo_atual:.2f} s")
+    print(f"pyarrow + datas nativas:        {tempo_novo:.2f} s")
+    print(f"Aceleração: {tempo_atual / tempo_novo:.1f}x")
@@ -0,0 +1,41 @@
+import os
+from dataclasses import dataclass
+from datetime import date
+
+# %% Contexto de execução do pipeline
+# Os scripts leem o contexto das variáveis de ambiente abaixo, definidas por pipeline.py. Executados
+# isoladamente, usam o diretório atual e a data do dia (calculada uma única vez por execução).
+
+VAR_DATA_REFERENCIA = 'BANVIC_DATA_REFERENCIA'
+VAR_DIR_ENTRADA = 'BANVIC_DIR_ENTRADA'
+VAR_DIR_SAIDA = 'BANVIC_DIR_SAIDA'
+
+@dataclass(frozen=True)
+class ContextoExecucao:
+    data_referencia: date  # Data usada no cálculo de idades e nas regras de "data futura"
+    dir_entrada: str = '.'  # Diretório dos arquivos brutos
+    dir_saida: str = '.'  # Diretório dos arquivos gerados (processados, sem inconsistências, etc.)
+
+    def entrada(self, arquivo):
+        return os.path.join(self.dir_entrada, arquivo)
+
+    def saida(self, arquivo):
+        return os.path.join(self.dir_saida, arquivo)
+
+    # Variáveis de ambiente que reproduzem este contexto em outro script
+    def variaveis_ambiente(self):
+        return {
+            VAR_DATA_REFERENCIA: self.data_referencia.isoformat(),
+            VAR_DIR_ENTRADA: self.dir_entrada,
+            VAR_DIR_SAIDA: self.dir_saida,
+        }
+
+def contexto_atual():
+    data_referencia = os.environ.get(VAR_DATA_REFERENCIA)
+    contexto = ContextoExecucao(
+        data_referencia=date.fromisoformat(data_referencia) if data_referencia else date.today(),
+        dir_entrada=os.environ.get(VAR_DIR_ENTRADA, '.'),
+        dir_saida=os.environ.get(VAR_DIR_SAIDA, '.'),
+    )
+    os.makedirs(contexto.dir_saida, exist_ok=True)
+    return contexto
@@ -1,13 +1,16 @@
 import pandas as pd
+from contexto_execucao import contexto_atual
 
 # %% Leitura dos arquivos processados
-agencias = pd.read_csv('agencias_processado.csv')
-clientes = pd.read_csv('clientes_processado.csv')
-colaboradores = pd.read_csv('colaboradores_processado.csv')
-contas = pd.read_csv('contas_processado.csv')
-propostas_credito = pd.read_csv('propostas_credito_processado.csv')
-transacoes = pd.read_csv('transacoes_processado.csv')
-colaborador_agencia = pd.read_csv('colaborador_agencia.csv')
+
+contexto = contexto_atual()  # Diretórios de entrada/saída da execução (ver contexto_execucao.py)
+agencias = pd.read_csv(contexto.saida('agencias_processado.csv'))
+clientes = pd.read_csv(contexto.saida('clientes_processado.csv'))
+colaboradores = pd.read_csv(contexto.saida('colaboradores_processado.csv'))
+contas = pd.read_csv(contexto.saida('contas_processado.csv'))
+propostas_credito = pd.read_csv(contexto.saida('propostas_credito_processado.csv'))
+transacoes = pd.read_csv(contexto.saida('transacoes_processado.csv'))
+colaborador_agencia = pd.read_csv(contexto.entrada('colaborador_agencia.csv'))
 
 # %% Processamento da tabela "contas"
 # Regra: os registros devem ter cod_cliente, cod_agencia e cod_colaborador válidos
@@ -49,17 +52,17 @@ transacoes_inconsistentes = transacoes[~mask_transacoes].copy()
 # %% Salvando os novos arquivos CSV sem inconsistências e os registros inconsistentes
 
 # Tabela "contas"
-contas_clean.to_csv('contas_sem_inconsistencias.csv', index=False)
-contas_inconsistentes.to_csv('contas_inconsistentes.csv', index=False)
+contas_clean.to_csv(contexto.saida('contas_sem_inconsistencias.csv'), index=False)
+contas_inconsistentes.to_csv(contexto.saida('contas_inconsistentes.csv'), index=False)
 
 # Tabela "propostas_credito"
-propostas_credito_clean.to_csv('propostas_credito_sem_inconsistencias.csv', index=False)
-propostas_credito_inconsistentes.to_csv('propostas_credito_inconsistentes.csv', index=False)
+propostas_credito_clean.to_csv(contexto.saida('propostas_credito_sem_inconsistencias.csv'), index=False)
+propostas_credito_inconsistentes.to_csv(contexto.saida('propostas_credito_inconsistentes.csv'), index=False)
 
 # Tabela "colaborador_agencia"
-colaborador_agencia_clean.to_csv('colaborador_agencia_sem_inconsistencias.csv', index=False)
-colaborador_agencia_inconsistentes.to_csv('colaborador_agencia_inconsistentes.csv', index=False)
+colaborador_agencia_clean.to_csv(contexto.saida('colaborador_agencia_sem_inconsistencias.csv'), index=False)
+colaborador_agencia_inconsistentes.to_csv(contexto.saida('colaborador_agencia_inconsistentes.csv'), index=False)
 
 # Tabela "transacoes"
-transacoes_clean.to_csv('transacoes_sem_inconsistencias.csv', index=False)
-transacoes_inconsistentes.to_csv('transacoes_inconsistentes.csv', index=False)
+transacoes_clean.to_csv(contexto.saida('transacoes_sem_inconsistencias.csv'), index=False)
+transacoes_inconsistentes.to_csv(contexto.saida('transacoes_inconsistentes.csv'), index=False)
@@ -0,0 +1,192 @@
+import csv
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.compute as pc
+
+# %% Esquemas esperados dos arquivos brutos
+# Colunas de data/hora no formato '2017-04-03 16:11:00 UTC' são declaradas como TIMESTAMP e convertidas
+# nativamente na leitura; datas simples ('2006-08-11') são lidas como date32.
+
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+ESQUEMAS = {
+    'agencias': {
+        'cod_agencia': pa.int64(), 'nome': pa.string(), 'endereco': pa.string(), 'cidade': pa.string(),
+        'uf': pa.string(), 'data_abertura': pa.date32(), 'tipo_agencia': pa.string(),
+    },
+    'clientes': {
+        'cod_cliente': pa.int64(), 'primeiro_nome': pa.string(), 'ultimo_nome': pa.string(), 'email': pa.string(),
+        'tipo_cliente': pa.string(), 'data_inclusao': TIMESTAMP, 'cpfcnpj': pa.string(),
+        'data_nascimento': pa.date32(), 'endereco': pa.string(), 'cep': pa.string(),
+    },
+    'colaborador_agencia': {
+        'cod_colaborador': pa.int64(), 'cod_agencia': pa.int64(),
+    },
+    'colaboradores': {
+        'cod_colaborador': pa.int64(), 'primeiro_nome': pa.string(), 'ultimo_nome': pa.string(), 'email': pa.string(),
+        'cpf': pa.string(), 'data_nascimento': pa.date32(), 'endereco': pa.string(), 'cep': pa.string(),
+    },
+    'contas': {
+        'num_conta': pa.int64(), 'cod_cliente': pa.int64(), 'cod_agencia': pa.int64(), 'cod_colaborador': pa.int64(),
+        'tipo_conta': pa.string(), 'data_abertura': TIMESTAMP, 'saldo_total': pa.float64(),
+        'saldo_disponivel': pa.float64(), 'data_ultimo_lancamento': TIMESTAMP,
+    },
+    'propostas_credito': {
+        'cod_proposta': pa.int64(), 'cod_cliente': pa.int64(), 'cod_colaborador': pa.int64(),
+        'data_entrada_proposta': TIMESTAMP, 'taxa_juros_mensal': pa.float64(), 'valor_proposta': pa.float64(),
+        'valor_financiamento': pa.float64(), 'valor_entrada': pa.float64(), 'valor_prestacao': pa.float64(),
+        'quantidade_parcelas': pa.int64(), 'carencia': pa.int64(), 'status_proposta': pa.string(),
+    },
+    'transacoes': {
+        'cod_transacao': pa.int64(), 'num_conta': pa.int64(), 'data_transacao': TIMESTAMP,
+        'nome_transacao': pa.string(), 'valor_transacao': pa.float64(),
+    },
+}
+
+# %% Funções
+
+# Lê apenas o cabeçalho do arquivo para validar a presença das colunas esperadas
+def validar_colunas(caminho, esquema):
+    with open(caminho, encoding='utf-8', newline='') as f:
+        cabecalho = next(csv.reader(f), [])
+    faltantes = [coluna for coluna in esquema if coluna not in cabecalho]
+    if faltantes:
+        raise ValueError(f"{caminho}: colunas ausentes {faltantes}")
+    return cabecalho
+
+# Numera as linhas físicas do arquivo (o leitor multi-thread do pyarrow não informa o número da linha).
+# Retorna a linha inicial de cada registro aceito, na ordem de leitura, as linhas com número de campos
+# incorreto (com o texto original) e o texto original dos registros aceitos nas posições 'posicoes_texto'.
+# Só é chamada quando há algo a pôr em quarentena, para não custar uma segunda leitura no caso comum.
+def numerar_linhas(caminho, num_campos, posicoes_texto=()):
+    posicoes_texto = set(posicoes_texto)
+    linhas_validas, linhas_invalidas, textos = [], [], {}
+    with open(caminho, encoding='utf-8', newline='') as f:
+        # O leitor consome uma linha por vez, então 'bruto' guarda exatamente as linhas do registro atual
+        bruto = []
+        def linhas():
+            for linha in f:
+                bruto.append(linha)
+                yield linha
+        leitor = csv.reader(linhas())
+        next(leitor, None)
+        ultima_linha = leitor.line_num
+        for registro in leitor:
+            inicio, ultima_linha = ultima_linha + 1, leitor.line_num
+            texto = ''.join(bruto).removesuffix('\n').removesuffix('\r')
+            bruto.clear()
+            if not registro:
+                continue  # Linhas vazias são ignoradas, como no pyarrow
+            if len(registro) == num_campos:
+                if len(linhas_validas) in posicoes_texto:
+                    textos[len(linhas_validas)] = texto
+                linhas_validas.append(inicio)
+            else:
+                linhas_invalidas.append((inicio, texto))
+    return np.array(linhas_validas, dtype=np.int64), linhas_invalidas, textos
+
+# Converte texto no formato 'AAAA-MM-DD HH:MM:SS[.ffffff] UTC' para timestamp, com o parser ISO-8601 do Arrow.
+# Retorna a coluna convertida e a máscara dos valores preenchidos que não puderam ser convertidos
+# (células vazias já chegam nulas e continuam nulas, sem ir para a quarentena).
+def converter_timestamp(coluna):
+    texto = pc.replace_substring(coluna, ' UTC', 'Z')
+    try:
+        return pc.cast(texto, TIMESTAMP), None
+    except pa.ArrowInvalid:
+        # Há valores malformados: recorre à conversão do pandas, que marca os inválidos como nulos
+        texto = texto.to_pandas()
+        convertido = pd.to_datetime(texto, format='ISO8601', errors='coerce', utc=True)
+        return pa.array(convertido, type=TIMESTAMP), (texto.notna() & convertido.isna()).to_numpy()
+
+# Converte texto para o tipo declarado (numérico ou data), retornando também a máscara de valores inválidos.
+# Em colunas inteiras, valores com parte fracionária são inválidos (não são truncados).
+def converter_texto(coluna, tipo):
+    texto = coluna.to_pandas()
+    if pa.types.is_date32(tipo):
+        convertido = pd.to_datetime(texto, format='%Y-%m-%d', errors='coerce')
+    else:
+        convertido = pd.to_numeric(texto, errors='coerce')
+    invalidos = texto.notna() & convertido.isna()
+    if pa.types.is_integer(tipo):
+        fracionarios = convertido.notna() & (convertido % 1 != 0)
+        convertido = convertido.mask(fracionarios)
+        invalidos |= fracionarios
+    return pa.array(convertido, type=tipo, from_pandas=True), invalidos.to_numpy()
+
+# Lê um CSV bruto com o leitor multi-thread do pyarrow, validando colunas e tipos pelo esquema.
+# Linhas malformadas (número de campos incorreto ou valores que não respeitam o tipo) são gravadas
+# em '<tabela>_quarentena.csv' (no diretório de saída) em vez de interromper a execução.
+def ler_csv(tabela, diretorio='.', dir_saida='.'):
+    esquema = ESQUEMAS[tabela]
+    caminho = os.path.join(diretorio, f'{tabela}.csv')
+    cabecalho = validar_colunas(caminho, esquema)
+
+    num_campos_invalidos = 0
+
+    def registrar_linha_invalida(linha):
+        nonlocal num_campos_invalidos
+        num_campos_invalidos += 1
+        return 'skip'
+
+    # Timestamps são lidos como texto e convertidos em seguida (o sufixo ' UTC' não é aceito pelo leitor)
+    tipos_leitura = {coluna: (pa.string() if tipo == TIMESTAMP else tipo) for coluna, tipo in esquema.items()}
+    opcoes_leitura = pv.ReadOptions(use_threads=True)
+    opcoes_parse = pv.ParseOptions(invalid_row_handler=registrar_linha_invalida)
+
+    # Células vazias são nulas também nas colunas de texto (como no pd.read_csv)
+    def ler(tipos):
+        return pv.read_csv(caminho, read_options=opcoes_leitura, parse_options=opcoes_parse,
+                           convert_options=pv.ConvertOptions(column_types=tipos, include_columns=list(esquema),
+                                                             strings_can_be_null=True))
+
+    try:
+        tabela_arrow = ler(tipos_leitura)
+        como_texto = False
+    except pa.ArrowInvalid:
+        # Algum valor não respeita o tipo declarado: relê tudo como texto para isolar as linhas problemáticas
+        num_campos_invalidos = 0
+        tabela_arrow = ler({coluna: pa.string() for coluna in esquema})
+        como_texto = True
+
+    colunas = {}
+    invalidos = np.zeros(tabela_arrow.num_rows, dtype=bool)
+    for coluna, tipo in esquema.items():
+        dados = tabela_arrow.column(coluna)
+        mascara = None
+        if tipo == TIMESTAMP:
+            dados, mascara = converter_timestamp(dados)
+        elif como_texto and tipo != pa.string():
+            dados, mascara = converter_texto(dados, tipo)
+        if mascara is not None:
+            invalidos |= mascara
+        colunas[coluna] = dados
+    df = pa.table(colunas).to_pandas(date_as_object=False)
+
+    # 'linha' é sempre o número da linha no arquivo original (o cabeçalho é a linha 1)
+    # e 'conteudo' é o texto original da linha, com as aspas, para que o registro possa ser relido
+    quarentena = []
+    if num_campos_invalidos or invalidos.any():
+        posicoes_invalidas = np.flatnonzero(invalidos)
+        linhas_validas, linhas_invalidas, textos = numerar_linhas(caminho, len(cabecalho), posicoes_invalidas)
+        quarentena += [{'linha': linha, 'motivo': 'numero_de_campos_invalido', 'conteudo': texto}
+                       for linha, texto in linhas_invalidas]
+        quarentena += [{'linha': linhas_validas[posicao], 'motivo': 'tipo_invalido', 'conteudo': textos[posicao]}
+                       for posicao in posicoes_invalidas]
+        df = df[~invalidos].reset_index(drop=True)
+
+    # Colunas inteiras voltam ao tipo declarado: valores mascarados na conversão (ou células vazias) as deixam
+    # como float64, o que seria gravado nos processados como '10.0'
+    for coluna, tipo in esquema.items():
+        if pa.types.is_integer(tipo) and df[coluna].dtype != np.int64:
+            df[coluna] = df[coluna].astype('Int64' if df[coluna].isna().any() else np.int64)
+
+    if quarentena:
+        quarentena = pd.DataFrame(quarentena).sort_values('linha')
+        quarentena.to_csv(os.path.join(dir_saida, f'{tabela}_quarentena.csv'), index=False)
+        print(f"{tabela}: {len(quarentena)} linha(s) em quarentena")
+    elif os.path.exists(os.path.join(dir_saida, f'{tabela}_quarentena.csv')):
+        os.remove(os.path.join(dir_saida, f'{tabela}_quarentena.csv'))  # Quarentena de uma leitura anterior
+    return df
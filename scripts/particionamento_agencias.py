@@ -0,0 +1,167 @@
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# %% Configurações
+
+DIR_PARTICOES = 'particoes'  # Diretório raiz das partições por agência
+DIR_RELATORIOS = 'relatorios_agencias'  # Diretório dos relatórios individuais de cada agência
+
+# %% Funções
+
+# Grava um DataFrame em CSV somente se o conteúdo for diferente do já existente em disco
+def gravar_particao(df, caminho):
+    conteudo = df.to_csv(index=False)
+    if os.path.exists(caminho):
+        with open(caminho, encoding='utf-8') as f:
+            if f.read() == conteudo:
+                return False
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8', newline='') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)  # Substituição atômica, leitores nunca veem um arquivo parcial
+    return True
+
+# Caminho da partição de uma tabela para uma agência (e opcionalmente um mês)
+def caminho_particao(tabela, cod_agencia, ano_mes=None):
+    partes = [DIR_PARTICOES, tabela, f'cod_agencia={cod_agencia}']
+    if ano_mes is not None:
+        partes.append(f'ano_mes={ano_mes}')
+    return os.path.join(*partes, f'{tabela}.csv')
+
+# Caminhos do relatório individual de uma agência
+def caminhos_relatorio(cod_agencia):
+    diretorio = os.path.join(DIR_RELATORIOS, f'cod_agencia={cod_agencia}')
+    return {nome: os.path.join(diretorio, f'{nome}.csv') for nome in ('kpis', 'transacoes_mensais', 'transacoes_por_nome')}
+
+# Remove os arquivos sob 'diretorio' que não existem mais no agrupamento atual ('vivas'), e os diretórios vazios.
+# Usada nas partições de cada tabela e nos relatórios por agência.
+def remover_particoes_obsoletas(diretorio, vivas):
+    removidas = []
+    for raiz, _, nomes in os.walk(diretorio, topdown=False):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            if caminho not in vivas:
+                os.remove(caminho)
+                removidas.append(caminho)
+        if raiz != diretorio and not os.listdir(raiz):
+            os.rmdir(raiz)
+    return removidas
+
+# Particiona contas e colaboradores por agência e transações por agência e mês.
+# Retorna as partições gravadas e as removidas (agência ou mês que deixou de ter dados).
+def particionar(colaboradores, contas, transacoes):
+    alteradas = []
+    removidas = []
+
+    # As transações herdam a agência da conta
+    transacoes = transacoes.merge(contas[['num_conta', 'cod_agencia']], on='num_conta', how='inner')
+    grupos = {
+        'colaboradores': colaboradores.groupby('cod_agencia'),
+        'contas': contas.groupby('cod_agencia'),
+        'transacoes': transacoes.groupby(['cod_agencia', 'data_transacao']),
+    }
+
+    for tabela, agrupamento in grupos.items():
+        vivas = set()
+        for chave, grupo in agrupamento:
+            if tabela == 'transacoes':
+                cod_agencia, ano_mes = chave
+                caminho = caminho_particao(tabela, int(cod_agencia), ano_mes)
+                grupo = grupo.drop(columns=['cod_agencia'])
+            else:
+                caminho = caminho_particao(tabela, int(chave))
+            vivas.add(caminho)
+            if gravar_particao(grupo, caminho):
+                alteradas.append(caminho)
+        removidas += remover_particoes_obsoletas(os.path.join(DIR_PARTICOES, tabela), vivas)
+
+    return alteradas, removidas
+
+# Lê todas as partições de uma tabela para uma agência, retornando um DataFrame vazio se não houver dados
+def ler_particoes(tabela, cod_agencia, colunas):
+    diretorio = os.path.dirname(caminho_particao(tabela, cod_agencia))
+    arquivos = []
+    for raiz, _, nomes in os.walk(diretorio):
+        arquivos += [os.path.join(raiz, nome) for nome in nomes if nome == f'{tabela}.csv']
+    if not arquivos:
+        return pd.DataFrame(columns=colunas)
+    return pd.concat([pd.read_csv(arquivo) for arquivo in sorted(arquivos)], ignore_index=True)
+
+# Calcula os indicadores de uma agência a partir apenas das suas partições e grava o relatório
+def calcular_kpis_agencia(agencia):
+    cod_agencia = agencia['cod_agencia']
+    colaboradores = ler_particoes('colaboradores', cod_agencia, ['cod_colaborador'])
+    contas = ler_particoes('contas', cod_agencia, ['num_conta', 'saldo_total', 'saldo_disponivel'])
+    transacoes = ler_particoes('transacoes', cod_agencia, ['data_transacao', 'nome_transacao', 'valor_transacao_abs'])
+
+    kpis = pd.DataFrame([{
+        'cod_agencia': cod_agencia,
+        'nome': agencia['nome'],
+        'uf': agencia['uf'],
+        'tipo_agencia': agencia['tipo_agencia'],
+        'num_colaboradores': len(colaboradores),
+        'num_contas': len(contas),
+        'saldo_total': contas['saldo_total'].sum(),
+        'saldo_disponivel': contas['saldo_disponivel'].sum(),
+        'num_transacoes': len(transacoes),
+        'volume_transacoes': transacoes['valor_transacao_abs'].sum(),
+    }])
+
+    transacoes_mensais = transacoes.groupby('data_transacao').agg(
+        num_transacoes=('valor_transacao_abs', 'count'),
+        volume_total=('valor_transacao_abs', 'sum')
+    ).reset_index()
+    transacoes_por_nome = transacoes.groupby('nome_transacao').agg(
+        num_transacoes=('valor_transacao_abs', 'count'),
+        volume_total=('valor_transacao_abs', 'sum')
+    ).reset_index()
+
+    # Relatório individual da agência
+    caminhos = caminhos_relatorio(cod_agencia)
+    gravar_particao(kpis, caminhos['kpis'])
+    gravar_particao(transacoes_mensais, caminhos['transacoes_mensais'])
+    gravar_particao(transacoes_por_nome, caminhos['transacoes_por_nome'])
+
+    return kpis
+
+# Consolida os indicadores de todas as agências na visão global
+def consolidar(kpis):
+    colab_by_agencia = kpis[['cod_agencia', 'num_colaboradores']]
+    contas_por_tipo = kpis.groupby('tipo_agencia').agg(cod_cliente=('num_contas', 'sum')).reset_index()
+    transacoes_por_tipo = kpis.groupby('tipo_agencia').agg(
+        num_transacoes=('num_transacoes', 'sum'),
+        volume_transacoes=('volume_transacoes', 'sum')
+    ).reset_index()
+    contas_por_uf = kpis.groupby('uf').agg(total_contas=('num_contas', 'sum')).reset_index()
+    return colab_by_agencia, contas_por_tipo, transacoes_por_tipo, contas_por_uf
+
+# %% Execução
+
+if __name__ == '__main__':
+    agencias = pd.read_csv('agencias_processado.csv')
+    colaboradores = pd.read_csv('colaboradores_processado.csv')
+    contas = pd.read_csv('contas_sem_inconsistencias.csv')
+    transacoes = pd.read_csv('transacoes_sem_inconsistencias.csv')
+
+    # %% Particionamento em disco
+    alteradas, removidas = particionar(colaboradores, contas, transacoes)
+    print(f"Partições gravadas ou atualizadas: {len(alteradas)}; removidas: {len(removidas)}")
+
+    # %% Indicadores por agência em paralelo
+    registros = agencias[['cod_agencia', 'nome', 'uf', 'tipo_agencia']].to_dict('records')
+    with ProcessPoolExecutor() as executor:
+        kpis = pd.concat(list(executor.map(calcular_kpis_agencia, registros)), ignore_index=True)
+
+    # Relatórios de agências que não foram processadas nesta execução (ex.: removidas de agencias.csv)
+    vivos = {caminho for agencia in registros for caminho in caminhos_relatorio(agencia['cod_agencia']).values()}
+    relatorios_removidos = remover_particoes_obsoletas(DIR_RELATORIOS, vivos)
+    print(f"Relatórios de agências removidos: {len(relatorios_removidos)}")
+
+    # %% Visão global a partir das partições
+    colab_by_agencia, contas_por_tipo, transacoes_por_tipo, contas_por_uf = consolidar(kpis)
+    kpis.to_csv('kpis_por_agencia.csv', index=False)
+    print("Número de contas por tipo de agência:\n", contas_por_tipo, "\n")
+    print("Transações por tipo de agência:\n", transacoes_por_tipo, "\n")
+    print("Contas por UF:\n", contas_por_uf, "\n")
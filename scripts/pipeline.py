@@ -0,0 +1,202 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import runpy
+import time
+from datetime import date, datetime, timezone
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+from contexto_execucao import ContextoExecucao
+from ingestao import converter_timestamp
+
+# %% Configurações
+
+DIR_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_MANIFESTO = 'manifesto_execucao.json'  # Manifesto da última execução, no diretório de saída
+ARQUIVO_HISTORICO = 'historico_execucoes.jsonl'  # Um manifesto por linha, para comparar execuções
+
+TABELAS = ['agencias', 'clientes', 'colaboradores', 'contas', 'propostas_credito', 'transacoes']
+TABELAS_INCONSISTENCIAS = ['contas', 'propostas_credito', 'colaborador_agencia', 'transacoes']
+
+# Etapas do pipeline: script executado e módulos que ele importa ('dependencias'), arquivos lidos do diretório
+# de entrada ('entrada') ou de saída ('intermediarios'), arquivos gerados no diretório de saída ('saida') e
+# arquivos gerados apenas quando necessário ('saida_opcional', ex.: as quarentenas de ingestao.py)
+ETAPAS = [
+    {
+        'nome': 'tratamento_dados',
+        'script': 'tratamento_dados.py',
+        'dependencias': ['ingestao.py', 'contexto_execucao.py'],
+        'entrada': [f'{tabela}.csv' for tabela in TABELAS + ['colaborador_agencia']],
+        'intermediarios': [],
+        'saida': [f'{tabela}_processado.csv' for tabela in TABELAS],
+        'saida_opcional': [f'{tabela}_quarentena.csv' for tabela in TABELAS + ['colaborador_agencia']],
+    },
+    {
+        'nome': 'inconsistencias',
+        'script': 'inconsistencias.py',
+        'dependencias': ['contexto_execucao.py'],
+        'entrada': ['colaborador_agencia.csv'],
+        'intermediarios': [f'{tabela}_processado.csv' for tabela in TABELAS],
+        'saida': [f'{tabela}_{sufixo}.csv' for tabela in TABELAS_INCONSISTENCIAS
+                  for sufixo in ('sem_inconsistencias', 'inconsistentes')],
+        'saida_opcional': [],
+    },
+]
+
+# %% Funções
+
+def hash_arquivo(caminho, bloco=1 << 20):
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            sha256.update(parte)
+    return sha256.hexdigest()
+
+# Conta os registros de um CSV (sem o cabeçalho), respeitando campos entre aspas
+def contar_linhas(caminho):
+    with open(caminho, encoding='utf-8', newline='') as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+def descrever_arquivos(arquivos, diretorio):
+    return {
+        arquivo: {'sha256': hash_arquivo(os.path.join(diretorio, arquivo)),
+                  'linhas': contar_linhas(os.path.join(diretorio, arquivo))}
+        for arquivo in arquivos
+    }
+
+# Arquivos gerados pela etapa: os obrigatórios e os opcionais que existirem
+def arquivos_saida(etapa, contexto):
+    return etapa['saida'] + [arquivo for arquivo in etapa['saida_opcional'] if os.path.exists(contexto.saida(arquivo))]
+
+# Chave que identifica o resultado de uma etapa: código do script e dos módulos que ele importa,
+# data de referência e hash das entradas
+def chave_etapa(etapa, contexto, entradas):
+    sha256 = hashlib.sha256()
+    for script in [etapa['script']] + etapa['dependencias']:
+        sha256.update(f"{script}:{hash_arquivo(os.path.join(DIR_SCRIPTS, script))}".encode())
+    sha256.update(contexto.data_referencia.isoformat().encode())
+    for arquivo, descricao in sorted(entradas.items()):
+        sha256.update(f"{arquivo}:{descricao['sha256']}".encode())
+    return sha256.hexdigest()
+
+# Data de referência derivada dos dados: o dia da última transação em transacoes.csv. Assim duas execuções
+# sobre os mesmos arquivos calculam as mesmas idades em qualquer dia (como o mês de referência de
+# segmentacao_clientes.py). Lê apenas a coluna de data.
+def data_referencia_dos_dados(dir_entrada):
+    datas = pv.read_csv(os.path.join(dir_entrada, 'transacoes.csv'),
+                        convert_options=pv.ConvertOptions(include_columns=['data_transacao'],
+                                                          column_types={'data_transacao': pa.string()},
+                                                          strings_can_be_null=True))
+    ultima = pc.max(converter_timestamp(datas.column('data_transacao'))[0]).as_py()
+    if ultima is None:
+        raise ValueError("transacoes.csv não possui datas válidas; informe --data-referencia")
+    return ultima.date()
+
+def ler_manifesto(contexto):
+    caminho = contexto.saida(ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+# Uma etapa pode ser pulada se a chave for a mesma da execução anterior e as saídas não tiverem mudado
+def pode_pular(etapa, chave, manifesto_anterior, contexto):
+    anterior = manifesto_anterior.get('etapas', {}).get(etapa['nome'])
+    if not anterior or anterior['chave'] != chave:
+        return False
+    if set(arquivos_saida(etapa, contexto)) != set(anterior['saida']):
+        return False
+    for arquivo, descricao in anterior['saida'].items():
+        caminho = contexto.saida(arquivo)
+        if not os.path.exists(caminho) or hash_arquivo(caminho) != descricao['sha256']:
+            return False
+    return True
+
+# Executa o script da etapa no mesmo processo, com o contexto repassado por variáveis de ambiente
+def executar_script(etapa, contexto):
+    ambiente_original = dict(os.environ)
+    os.environ.update(contexto.variaveis_ambiente())
+    try:
+        runpy.run_path(os.path.join(DIR_SCRIPTS, etapa['script']), run_name='__main__')
+    finally:
+        os.environ.clear()
+        os.environ.update(ambiente_original)
+
+# Grava o manifesto de forma atômica: leitores (ex.: servico_kpis.py) nunca veem um arquivo parcial
+def gravar_manifesto(manifesto, contexto):
+    caminho = contexto.saida(ARQUIVO_MANIFESTO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+    with open(contexto.saida(ARQUIVO_HISTORICO), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(manifesto, ensure_ascii=False) + '\n')
+
+# 'origem_data_referencia' registra de onde veio a data: 'argumento' (--data-referencia) ou 'dados'
+def executar_pipeline(contexto, forcar=False, origem_data_referencia='argumento'):
+    manifesto_anterior = {} if forcar else ler_manifesto(contexto)
+    manifesto = {
+        'inicio': datetime.now(timezone.utc).isoformat(),
+        'data_referencia': contexto.data_referencia.isoformat(),
+        'origem_data_referencia': origem_data_referencia,
+        'dir_entrada': os.path.abspath(contexto.dir_entrada),
+        'dir_saida': os.path.abspath(contexto.dir_saida),
+        'etapas': {},
+    }
+    inicio_total = time.perf_counter()
+
+    for etapa in ETAPAS:
+        inicio = time.perf_counter()
+        entradas = descrever_arquivos(etapa['entrada'], contexto.dir_entrada)
+        entradas.update(descrever_arquivos(etapa['intermediarios'], contexto.dir_saida))
+        chave = chave_etapa(etapa, contexto, entradas)
+
+        if pode_pular(etapa, chave, manifesto_anterior, contexto):
+            registro = dict(manifesto_anterior['etapas'][etapa['nome']], pulada=True)
+            print(f"Etapa {etapa['nome']}: sem alterações, pulada")
+        else:
+            inicio_script = time.perf_counter()
+            executar_script(etapa, contexto)
+            registro = {
+                'chave': chave,
+                'pulada': False,
+                'duracao_script_s': round(time.perf_counter() - inicio_script, 3),
+                'entrada': entradas,
+                'saida': descrever_arquivos(arquivos_saida(etapa, contexto), contexto.dir_saida),
+            }
+            print(f"Etapa {etapa['nome']}: executada em {registro['duracao_script_s']:.2f} s")
+        registro['duracao_total_s'] = round(time.perf_counter() - inicio, 3)
+        manifesto['etapas'][etapa['nome']] = registro
+
+    manifesto['duracao_total_s'] = round(time.perf_counter() - inicio_total, 3)
+    gravar_manifesto(manifesto, contexto)
+    return manifesto
+
+# %% Execução
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Executa tratamento_dados.py e inconsistencias.py de forma reprodutível, '
+                                                 'gerando um manifesto da execução.')
+    parser.add_argument('--data-referencia', type=date.fromisoformat,
+                        help='Data usada no cálculo das idades (AAAA-MM-DD); padrão: dia da última transação')
+    parser.add_argument('--entrada', default='.', help='Diretório dos arquivos brutos')
+    parser.add_argument('--saida', default='.', help='Diretório dos arquivos gerados')
+    parser.add_argument('--forcar', action='store_true', help='Executa todas as etapas mesmo sem alterações')
+    args = parser.parse_args()
+
+    if args.data_referencia:
+        data_referencia, origem = args.data_referencia, 'argumento'
+    else:
+        data_referencia, origem = data_referencia_dos_dados(args.entrada), 'dados'
+    print(f"Data de referência: {data_referencia} ({origem})")
+
+    contexto = ContextoExecucao(data_referencia, args.entrada, args.saida)
+    os.makedirs(contexto.dir_saida, exist_ok=True)
+    manifesto = executar_pipeline(contexto, args.forcar, origem)
+
+    # Resumo das contagens por etapa: bruto -> processado -> sem_inconsistencias / inconsistentes
+    for nome, etapa in manifesto['etapas'].items():
+        for arquivo, descricao in etapa['saida'].items():
+            print(f"  {nome}: {arquivo} ({descricao['linhas']} linhas)")
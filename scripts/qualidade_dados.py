@@ -0,0 +1,287 @@
+import csv
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+from contexto_execucao import contexto_atual
+from ingestao import numerar_linhas
+
+# %% Configurações
+
+TAMANHO_LOTE = 1_000_000  # Número mínimo de linhas avaliadas por vez, mantém a memória constante em tabelas grandes
+CONTEXTO = contexto_atual()
+# Fim do dia de referência da execução, usado pelas regras de "data futura" e de idade
+DATA_REFERENCIA = pd.Timestamp(CONTEXTO.data_referencia, tz='UTC') + pd.Timedelta(days=1)
+TOLERANCIA = 0.01  # Tolerância para comparações entre valores monetários
+# Regra estrutural, avaliada na leitura: linhas com número de campos diferente do cabeçalho (as mesmas que
+# ingestao.py põe em quarentena) não são interpretadas e recebem apenas este bit
+REGRA_NUMERO_DE_CAMPOS = 'numero_de_campos_invalido'
+
+UFS = ['AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG', 'PA', 'PB',
+       'PR', 'PE', 'PI', 'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO']
+STATUS_PROPOSTA = ['Aprovada', 'Em análise', 'Enviada', 'Validação documentos']
+NOMES_TRANSACAO = ['Pix - Recebido', 'TED - Recebido', 'DOC - Recebido', 'Depósito em espécie', 'Estorno de Debito',
+                   'Transferência entre CC - Crédito', 'Saque', 'Pix Saque', 'Compra Débito', 'Compra Crédito',
+                   'DOC - Realizado', 'Pix - Realizado', 'TED - Realizado', 'Pagamento de boleto',
+                   'Transferência entre CC - Débito']
+
+# %% Funções auxiliares (vetorizadas)
+
+# Converte uma coluna de datas no formato informado; valores inválidos viram NaT
+def para_data(serie, formato):
+    return pd.to_datetime(serie, format=formato, errors='coerce', utc=True)
+
+# Datas no formato '2017-04-03 16:11:00 UTC', com ou sem frações de segundo
+def data_utc(serie):
+    return para_data(serie.astype('string').str.removesuffix(' UTC'), 'ISO8601')
+
+def data_simples(serie):
+    return para_data(serie, '%Y-%m-%d')
+
+# Equivalente vetorizado de format_cep: True quando a função retornaria None
+def cep_invalido(serie):
+    cep = serie.astype(str).str.zfill(8).str.replace(r'\D', '', regex=True)
+    return cep.str.len() != 8
+
+# Colunas numéricas e de data de cada tabela. Os lotes são lidos como texto e essas colunas são convertidas
+# uma única vez por lote (ver preparar_lote); valores que não puderem ser convertidos viram regras de violação.
+COLUNAS_NUMERICAS = {
+    'agencias': ['cod_agencia'],
+    'clientes': ['cod_cliente'],
+    'colaboradores': ['cod_colaborador'],
+    'colaborador_agencia': ['cod_colaborador', 'cod_agencia'],
+    'contas': ['num_conta', 'cod_cliente', 'cod_agencia', 'cod_colaborador', 'saldo_total', 'saldo_disponivel'],
+    'propostas_credito': ['cod_proposta', 'cod_cliente', 'cod_colaborador', 'taxa_juros_mensal', 'valor_proposta',
+                          'valor_financiamento', 'valor_entrada', 'valor_prestacao', 'quantidade_parcelas', 'carencia'],
+    'transacoes': ['cod_transacao', 'num_conta', 'valor_transacao'],
+}
+COLUNAS_DATA = {
+    'agencias': {'data_abertura': data_simples},
+    'clientes': {'data_inclusao': data_utc, 'data_nascimento': data_simples},
+    'colaboradores': {'data_nascimento': data_simples},
+    'colaborador_agencia': {},
+    'contas': {'data_abertura': data_utc, 'data_ultimo_lancamento': data_utc},
+    'propostas_credito': {'data_entrada_proposta': data_utc},
+    'transacoes': {'data_transacao': data_utc},
+}
+
+# Converte as colunas numéricas e de data de um lote lido como texto. Para cada coluna convertida são criadas
+# as colunas auxiliares '<coluna>__invalido' (valor preenchido mas não convertido) e, nas datas, '<coluna>__data'.
+def preparar_lote(lote, tabela):
+    for coluna in COLUNAS_NUMERICAS[tabela]:
+        texto = lote[coluna]
+        lote[coluna] = pd.to_numeric(texto, errors='coerce')
+        lote[f'{coluna}__invalido'] = texto.notna() & lote[coluna].isna()
+    for coluna, conversor in COLUNAS_DATA[tabela].items():
+        lote[f'{coluna}__data'] = conversor(lote[coluna])
+        lote[f'{coluna}__invalido'] = lote[coluna].notna() & lote[f'{coluna}__data'].isna()
+    return lote
+
+# Data preenchida mas que não pôde ser interpretada
+def data_invalida(df, coluna):
+    return df[f'{coluna}__invalido']
+
+def data_futura(df, coluna):
+    return df[f'{coluna}__data'] > DATA_REFERENCIA
+
+def idade_em_anos(df, coluna):
+    return (DATA_REFERENCIA - df[f'{coluna}__data']).dt.days / 365.25
+
+# Uma regra '<coluna>_nao_numerico' para cada coluna numérica da tabela
+def regras_nao_numericas(tabela):
+    return [(f'{coluna}_nao_numerico', lambda df, coluna=coluna: df[f'{coluna}__invalido'])
+            for coluna in COLUNAS_NUMERICAS[tabela]]
+
+# %% Regras por tabela
+# Cada regra é um par (nome, função) em que a função recebe o DataFrame e retorna uma máscara booleana
+# com True nas linhas que VIOLAM a regra. Cada tabela pode ter até 63 regras (uma por bit), contando as
+# regras '<coluna>_nao_numerico' acrescentadas automaticamente (ver regras_da_tabela); o último bit é
+# o da regra estrutural REGRA_NUMERO_DE_CAMPOS.
+
+REGRAS = {
+    'agencias': [
+        ('cod_agencia_nulo', lambda df: df['cod_agencia'].isna()),
+        ('endereco_sem_cep', lambda df: ~df['endereco'].astype(str).str.contains(r'\d{5}-\d{3}', regex=True)),
+        ('uf_invalida', lambda df: ~df['uf'].isin(UFS)),
+        ('data_abertura_invalida', lambda df: data_invalida(df, 'data_abertura')),
+        ('data_abertura_futura', lambda df: data_futura(df, 'data_abertura')),
+        ('tipo_agencia_invalido', lambda df: ~df['tipo_agencia'].isin(['Física', 'Digital'])),
+    ],
+    'clientes': [
+        ('cod_cliente_nulo', lambda df: df['cod_cliente'].isna()),
+        ('tipo_cliente_invalido', lambda df: ~df['tipo_cliente'].isin(['PF', 'PJ'])),
+        ('email_invalido', lambda df: ~df['email'].astype(str).str.contains('@', regex=False)),
+        ('cep_invalido', lambda df: cep_invalido(df['cep'])),
+        ('data_inclusao_invalida', lambda df: data_invalida(df, 'data_inclusao')),
+        ('data_inclusao_futura', lambda df: data_futura(df, 'data_inclusao')),
+        ('data_nascimento_invalida', lambda df: data_invalida(df, 'data_nascimento')),
+        ('data_nascimento_futura', lambda df: data_futura(df, 'data_nascimento')),
+        ('idade_acima_de_120', lambda df: idade_em_anos(df, 'data_nascimento') > 120),
+        ('inclusao_antes_do_nascimento', lambda df: df['data_inclusao__data'] < df['data_nascimento__data']),
+    ],
+    'colaboradores': [
+        ('cod_colaborador_nulo', lambda df: df['cod_colaborador'].isna()),
+        ('email_invalido', lambda df: ~df['email'].astype(str).str.contains('@', regex=False)),
+        ('cpf_invalido', lambda df: ~df['cpf'].astype(str).str.fullmatch(r'\d{3}\.\d{3}\.\d{3}-\d{2}')),
+        ('cep_invalido', lambda df: cep_invalido(df['cep'])),
+        ('data_nascimento_invalida', lambda df: data_invalida(df, 'data_nascimento')),
+        ('data_nascimento_futura', lambda df: data_futura(df, 'data_nascimento')),
+        ('idade_abaixo_de_16', lambda df: idade_em_anos(df, 'data_nascimento') < 16),
+        ('idade_acima_de_100', lambda df: idade_em_anos(df, 'data_nascimento') > 100),
+    ],
+    'colaborador_agencia': [
+        ('cod_colaborador_nulo', lambda df: df['cod_colaborador'].isna()),
+        ('cod_agencia_nulo', lambda df: df['cod_agencia'].isna()),
+    ],
+    'contas': [
+        ('num_conta_nulo', lambda df: df['num_conta'].isna()),
+        ('cod_cliente_nulo', lambda df: df['cod_cliente'].isna()),
+        ('cod_agencia_nulo', lambda df: df['cod_agencia'].isna()),
+        ('cod_colaborador_nulo', lambda df: df['cod_colaborador'].isna()),
+        ('tipo_conta_invalido', lambda df: ~df['tipo_conta'].isin(['PF', 'PJ'])),
+        ('saldo_disponivel_maior_que_total', lambda df: df['saldo_disponivel'] > df['saldo_total'] + TOLERANCIA),
+        ('saldo_nulo', lambda df: df['saldo_total'].isna() | df['saldo_disponivel'].isna()),
+        ('data_abertura_invalida', lambda df: data_invalida(df, 'data_abertura')),
+        ('data_abertura_futura', lambda df: data_futura(df, 'data_abertura')),
+        ('data_ultimo_lancamento_invalida', lambda df: data_invalida(df, 'data_ultimo_lancamento')),
+        ('data_ultimo_lancamento_futura', lambda df: data_futura(df, 'data_ultimo_lancamento')),
+        ('ultimo_lancamento_antes_da_abertura',
+         lambda df: df['data_ultimo_lancamento__data'] < df['data_abertura__data']),
+    ],
+    'propostas_credito': [
+        ('cod_proposta_nulo', lambda df: df['cod_proposta'].isna()),
+        ('cod_cliente_nulo', lambda df: df['cod_cliente'].isna()),
+        ('cod_colaborador_nulo', lambda df: df['cod_colaborador'].isna()),
+        ('valor_proposta_negativo', lambda df: df['valor_proposta'] < 0),
+        ('valor_entrada_negativo', lambda df: df['valor_entrada'] < 0),
+        ('valor_financiamento_nao_positivo', lambda df: df['valor_financiamento'] <= 0),
+        ('valor_prestacao_nao_positivo', lambda df: df['valor_prestacao'] <= 0),
+        ('entrada_mais_proposta_diferente_do_financiamento',
+         lambda df: (df['valor_entrada'] + df['valor_proposta'] - df['valor_financiamento']).abs() > TOLERANCIA),
+        ('taxa_juros_fora_do_intervalo', lambda df: (df['taxa_juros_mensal'] < 0) | (df['taxa_juros_mensal'] > 1)),
+        ('quantidade_parcelas_nao_positiva', lambda df: df['quantidade_parcelas'] <= 0),
+        ('carencia_negativa', lambda df: df['carencia'] < 0),
+        ('status_invalido', lambda df: ~df['status_proposta'].isin(STATUS_PROPOSTA)),
+        ('data_entrada_invalida', lambda df: data_invalida(df, 'data_entrada_proposta')),
+        ('data_entrada_futura', lambda df: data_futura(df, 'data_entrada_proposta')),
+    ],
+    'transacoes': [
+        ('cod_transacao_nulo', lambda df: df['cod_transacao'].isna()),
+        ('num_conta_nulo', lambda df: df['num_conta'].isna()),
+        ('valor_nulo', lambda df: df['valor_transacao'].isna()),
+        ('valor_zero', lambda df: df['valor_transacao'] == 0),
+        ('nome_transacao_desconhecido', lambda df: ~df['nome_transacao'].isin(NOMES_TRANSACAO)),
+        ('data_transacao_invalida', lambda df: data_invalida(df, 'data_transacao')),
+        ('data_transacao_futura', lambda df: data_futura(df, 'data_transacao')),
+    ],
+}
+
+def regras_da_tabela(tabela):
+    return REGRAS[tabela] + regras_nao_numericas(tabela)
+
+# %% Motor de validação
+
+# Lê o CSV como texto, em lotes de pelo menos 'tamanho_lote' registros, com o leitor em streaming do pyarrow
+# (células vazias são nulas). Linhas com número de campos incorreto são descartadas e acrescentadas a 'invalidas'.
+def ler_lotes(caminho, tamanho_lote, invalidas):
+    with open(caminho, encoding='utf-8', newline='') as f:
+        cabecalho = next(csv.reader(f), None)
+    if not cabecalho:
+        return
+
+    def registrar_linha_invalida(linha):
+        invalidas.append(linha.text)
+        return 'skip'
+
+    leitor = pv.open_csv(caminho, parse_options=pv.ParseOptions(invalid_row_handler=registrar_linha_invalida),
+                         convert_options=pv.ConvertOptions(column_types={coluna: pa.string() for coluna in cabecalho},
+                                                           strings_can_be_null=True))
+    blocos, num_linhas = [], 0
+    for bloco in leitor:
+        blocos.append(bloco)
+        num_linhas += bloco.num_rows
+        if num_linhas >= tamanho_lote:
+            yield pa.Table.from_batches(blocos).to_pandas()
+            blocos, num_linhas = [], 0
+    if blocos:
+        yield pa.Table.from_batches(blocos).to_pandas()
+
+def contar_linhas_fisicas(caminho, bloco=1 << 24):
+    total, ultimo = 0, b'\n'
+    with open(caminho, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            total += parte.count(b'\n')
+            ultimo = parte[-1:]
+    return total + (ultimo != b'\n')
+
+# Número da linha no arquivo original (cabeçalho na linha 1, como em ingestao.py) de cada registro lido e das
+# linhas com número de campos incorreto. No caso comum (um registro por linha, sem linhas vazias nem inválidas)
+# a linha é a posição + 2; caso contrário, o arquivo é numerado com ingestao.numerar_linhas.
+def numerar_registros(caminho, num_registros, num_invalidas):
+    if not num_invalidas and contar_linhas_fisicas(caminho) == num_registros + 1:
+        return np.arange(2, num_registros + 2, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    with open(caminho, encoding='utf-8', newline='') as f:
+        num_campos = len(next(csv.reader(f), []))
+    linhas_validas, linhas_invalidas, _ = numerar_linhas(caminho, num_campos)
+    return linhas_validas, np.array([linha for linha, _ in linhas_invalidas], dtype=np.int64)
+
+# Avalia todas as regras de um lote e retorna a máscara de bits de cada linha e o número de violações por regra
+def avaliar_lote(df, regras):
+    bitmask = np.zeros(len(df), dtype=np.uint64)
+    contagens = np.zeros(len(regras), dtype=np.int64)
+    for bit, (_, regra) in enumerate(regras):
+        violacao = regra(df).fillna(False).to_numpy(dtype=bool)
+        contagens[bit] = np.count_nonzero(violacao)
+        bitmask |= violacao.astype(np.uint64) << np.uint64(bit)
+    return bitmask, contagens
+
+# Valida uma tabela em uma única leitura por lotes; grava a matriz de violações e retorna o resumo.
+# A regra estrutural REGRA_NUMERO_DE_CAMPOS ocupa o bit seguinte ao da última regra.
+def validar_tabela(tabela, regras):
+    if len(regras) + 1 > 64:
+        raise ValueError(f"A tabela {tabela} possui mais de 64 regras")
+
+    caminho = CONTEXTO.entrada(f'{tabela}.csv')
+    contagens = np.zeros(len(regras) + 1, dtype=np.int64)
+    invalidas = []
+    posicoes, bitmasks = [], []
+    num_registros = 0
+    for lote in ler_lotes(caminho, TAMANHO_LOTE, invalidas):
+        bitmask, contagens_lote = avaliar_lote(preparar_lote(lote, tabela), regras)
+        contagens[:-1] += contagens_lote
+
+        # Apenas linhas com ao menos uma violação entram na matriz
+        com_violacao = np.flatnonzero(bitmask)
+        posicoes.append(com_violacao + num_registros)
+        bitmasks.append(bitmask[com_violacao])
+        num_registros += len(lote)
+    contagens[-1] = len(invalidas)
+    total_linhas = num_registros + len(invalidas)
+
+    # 'linha' é a linha no arquivo original, para cruzar com a quarentena de ingestao.py
+    linhas_validas, linhas_invalidas = numerar_registros(caminho, num_registros, len(invalidas))
+    violacoes = pd.DataFrame({
+        'linha': np.concatenate([linhas_validas[np.concatenate(posicoes)] if posicoes else [], linhas_invalidas]),
+        'bitmask': np.concatenate(bitmasks + [np.full(len(linhas_invalidas), 1 << len(regras), dtype=np.uint64)]),
+    }).astype({'linha': np.int64}).sort_values('linha')
+    arquivo_violacoes = CONTEXTO.saida(f'qualidade_{tabela}_violacoes.csv')
+    violacoes.to_csv(arquivo_violacoes + '.tmp', index=False)
+    os.replace(arquivo_violacoes + '.tmp', arquivo_violacoes)
+
+    return pd.DataFrame({
+        'tabela': tabela,
+        'bit': np.arange(len(regras) + 1),
+        'regra': [nome for nome, _ in regras] + [REGRA_NUMERO_DE_CAMPOS],
+        'violacoes': contagens,
+        'total_linhas': total_linhas,
+        'percentual': contagens / total_linhas * 100 if total_linhas else 0.0,
+    })
+
+# %% Execução
+
+if __name__ == '__main__':
+    resumo = pd.concat([validar_tabela(tabela, regras_da_tabela(tabela)) for tabela in REGRAS], ignore_index=True)
+    resumo.to_csv(CONTEXTO.saida('qualidade_resumo.csv'), index=False)
+    print("Resumo das violações de qualidade:")
+    print(resumo[resumo['violacoes'] > 0].to_string(index=False))
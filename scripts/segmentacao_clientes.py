@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+# %% Configurações
+
+NUM_FAIXAS_RFM = 5  # Notas de 1 a 5 para recência, frequência e valor
+MESES_CLIENTE_NOVO = 6  # Clientes com até 6 meses de relacionamento formam o segmento 'Novos'
+
+# Formato compacto das features por cliente: um array estruturado do numpy, gravado em 'features_clientes.npy'
+FEATURES_DTYPE = np.dtype([
+    ('cod_cliente', np.int64),
+    ('mes_inclusao', np.int32),            # Meses desde o ano 0 (ano * 12 + mês - 1)
+    ('meses_de_relacionamento', np.int32),
+    ('num_contas', np.int32),
+    ('saldo_total', np.float64),
+    ('saldo_disponivel', np.float64),
+    ('num_transacoes', np.int64),
+    ('volume_transacoes', np.float64),
+    ('meses_ativos', np.int32),
+    ('frequencia_mensal', np.float32),     # Transações por mês de relacionamento
+    ('recencia_meses', np.int32),          # Meses desde a última transação (-1 se nunca transacionou)
+    ('num_propostas', np.int32),
+    ('valor_credito_aprovado', np.float64),
+])
+
+SEGMENTOS = ['Novos', 'Campeões', 'Leais', 'Em risco', 'Hibernando', 'Potenciais']
+
+# %% Funções
+
+# Converte 'AAAA-MM' em um inteiro de meses, para que diferenças entre datas sejam subtrações
+def mes_para_indice(serie):
+    datas = pd.to_datetime(serie, format='%Y-%m', errors='coerce')
+    indice = datas.dt.year * 12 + datas.dt.month - 1
+    return indice.fillna(-1).to_numpy(dtype=np.int32)
+
+def indice_para_mes(indice):
+    return [f'{i // 12:04d}-{i % 12 + 1:02d}' for i in indice]
+
+# Soma 'pesos' por posição de cliente; posições -1 (sem cliente correspondente) são descartadas
+def somar_por_cliente(posicoes, num_clientes, pesos=None):
+    validos = posicoes >= 0
+    return np.bincount(posicoes[validos], weights=None if pesos is None else pesos[validos], minlength=num_clientes)
+
+# Posição de cada código no vetor ordenado de clientes, ou -1 se o cliente não existir
+def posicao_cliente(codigos_clientes, codigos):
+    posicoes = np.searchsorted(codigos_clientes, codigos)
+    posicoes = np.clip(posicoes, 0, len(codigos_clientes) - 1)
+    return np.where(codigos_clientes[posicoes] == codigos, posicoes, -1)
+
+# Monta o vetor de features de todos os clientes em uma única passada vetorizada por tabela
+def construir_features(clientes, contas, transacoes, propostas, mes_referencia):
+    clientes = clientes.sort_values('cod_cliente')
+    codigos = clientes['cod_cliente'].to_numpy(dtype=np.int64)
+    n = len(codigos)
+    features = np.zeros(n, dtype=FEATURES_DTYPE)
+    features['cod_cliente'] = codigos
+    features['mes_inclusao'] = mes_para_indice(clientes['data_inclusao'])
+    features['meses_de_relacionamento'] = np.where(features['mes_inclusao'] >= 0,
+                                                   mes_referencia - features['mes_inclusao'], 0)
+
+    # Contas e saldos
+    pos_contas = posicao_cliente(codigos, contas['cod_cliente'].to_numpy(dtype=np.int64))
+    features['num_contas'] = somar_por_cliente(pos_contas, n)
+    features['saldo_total'] = somar_por_cliente(pos_contas, n, contas['saldo_total'].to_numpy())
+    features['saldo_disponivel'] = somar_por_cliente(pos_contas, n, contas['saldo_disponivel'].to_numpy())
+
+    # Transações: o cliente vem da conta
+    conta_para_cliente = pd.Series(pos_contas, index=contas['num_conta'].to_numpy())
+    pos_transacoes = conta_para_cliente.reindex(transacoes['num_conta'].to_numpy()).fillna(-1).to_numpy(dtype=np.int64)
+    meses_transacoes = mes_para_indice(transacoes['data_transacao'])
+    features['num_transacoes'] = somar_por_cliente(pos_transacoes, n)
+    features['volume_transacoes'] = somar_por_cliente(pos_transacoes, n, transacoes['valor_transacao_abs'].to_numpy())
+
+    ultimo_mes = np.full(n, -1, dtype=np.int32)
+    validos = (pos_transacoes >= 0) & (meses_transacoes >= 0)
+    np.maximum.at(ultimo_mes, pos_transacoes[validos], meses_transacoes[validos])
+    features['recencia_meses'] = np.where(ultimo_mes >= 0, mes_referencia - ultimo_mes, -1)
+
+    # Meses distintos com transação (pares cliente x mês únicos)
+    pares = np.unique(pos_transacoes[validos] * np.int64(1 << 20) + meses_transacoes[validos])
+    features['meses_ativos'] = somar_por_cliente(pares // (1 << 20), n)
+    features['frequencia_mensal'] = features['num_transacoes'] / np.maximum(features['meses_de_relacionamento'], 1)
+
+    # Propostas de crédito
+    pos_propostas = posicao_cliente(codigos, propostas['cod_cliente'].to_numpy(dtype=np.int64))
+    aprovadas = (propostas['status_proposta'] == 'Aprovada').to_numpy()
+    features['num_propostas'] = somar_por_cliente(pos_propostas, n)
+    features['valor_credito_aprovado'] = somar_por_cliente(
+        pos_propostas, n, np.where(aprovadas, propostas['valor_financiamento'].to_numpy(), 0.0))
+
+    return features, pares
+
+# Matriz de retenção por coorte de inclusão: fração dos clientes de cada coorte com transação k meses após a inclusão.
+# Células ainda não observáveis (coorte + k posterior ao mês de referência) ficam vazias (NaN), e não 0.
+def matriz_retencao(features, pares, mes_referencia):
+    pos = pares // (1 << 20)
+    meses = pares % (1 << 20)
+    coorte_cliente = features['mes_inclusao']
+    defasagem = meses - coorte_cliente[pos]
+    validos = (coorte_cliente[pos] >= 0) & (defasagem >= 0)
+
+    coortes, coorte_idx = np.unique(coorte_cliente[coorte_cliente >= 0], return_inverse=True)
+    mapa = np.full(coorte_cliente.max() + 1 if len(coortes) else 1, -1)
+    mapa[coortes] = np.arange(len(coortes))
+    num_colunas = int(mes_referencia - coortes.min()) + 1 if len(coortes) else 1
+
+    ativos = np.zeros((len(coortes), num_colunas), dtype=np.int64)
+    np.add.at(ativos, (mapa[coorte_cliente[pos[validos]]], defasagem[validos]), 1)
+    tamanho = np.bincount(coorte_idx, minlength=len(coortes))
+
+    observavel = coortes[:, None] + np.arange(num_colunas) <= mes_referencia
+    retencao = pd.DataFrame(np.where(observavel, ativos / tamanho[:, None], np.nan),
+                            index=indice_para_mes(coortes), columns=range(num_colunas))
+    retencao.index.name = 'coorte'
+    retencao.insert(0, 'clientes', tamanho)
+    return retencao
+
+# Nota de 1 a NUM_FAIXAS_RFM pela faixa de quantil de cada valor entre os clientes.
+# Os pontos de corte usam np.quantile (seleção parcial, sem ordenar todos os valores).
+def nota_por_percentil(valores, maior_melhor=True):
+    cortes = np.quantile(valores, np.linspace(0, 1, NUM_FAIXAS_RFM + 1)[1:-1])
+    nota = np.searchsorted(cortes, valores, side='left').astype(np.int8) + 1
+    return nota if maior_melhor else (NUM_FAIXAS_RFM + 1 - nota).astype(np.int8)
+
+# Segmentação RFM (recência, frequência, valor) a partir das features.
+# As notas são calculadas apenas entre clientes que transacionaram; os demais recebem nota 1.
+# Clientes com até MESES_CLIENTE_NOVO meses de relacionamento são 'Novos', independentemente das notas.
+def calcular_segmentos(features):
+    transacionou = features['recencia_meses'] >= 0
+    r, f, m = (np.ones(len(features), dtype=np.int8) for _ in range(3))
+    r[transacionou] = nota_por_percentil(features['recencia_meses'][transacionou], maior_melhor=False)
+    f[transacionou] = nota_por_percentil(features['frequencia_mensal'][transacionou])
+    m[transacionou] = nota_por_percentil(features['volume_transacoes'][transacionou])
+
+    novo = (features['mes_inclusao'] >= 0) & (features['meses_de_relacionamento'] <= MESES_CLIENTE_NOVO)
+    codigos = np.select(
+        [novo, (r >= 4) & (f >= 4), f >= 4, (r <= 2) & (f >= 3), (r <= 2) & (f <= 2)],
+        range(len(SEGMENTOS) - 1), default=len(SEGMENTOS) - 1).astype(np.int8)
+    segmento = pd.Categorical.from_codes(codigos, categories=SEGMENTOS)
+
+    return pd.DataFrame({
+        'cod_cliente': features['cod_cliente'],
+        'recencia': r, 'frequencia': f, 'valor': m,
+        'rfm': r.astype(np.int16) * 100 + f * 10 + m,
+        'segmento': segmento,
+    })
+
+# %% Execução
+
+if __name__ == '__main__':
+    clientes = pd.read_csv('clientes_processado.csv')
+    contas = pd.read_csv('contas_sem_inconsistencias.csv')
+    transacoes = pd.read_csv('transacoes_sem_inconsistencias.csv')
+    propostas = pd.read_csv('propostas_credito_sem_inconsistencias.csv')
+
+    # O mês de referência é o último mês com transações, de forma que o resultado não depende do dia da execução
+    mes_referencia = int(mes_para_indice(transacoes['data_transacao']).max())
+
+    # %% Features por cliente
+    features, pares = construir_features(clientes, contas, transacoes, propostas, mes_referencia)
+    np.save('features_clientes.npy', features)
+
+    # %% Coortes de inclusão
+    retencao = matriz_retencao(features, pares, mes_referencia)
+    retencao.to_csv('retencao_coortes.csv')
+
+    # %% Segmentos RFM
+    segmentos = calcular_segmentos(features)
+    segmentos.to_csv('segmentos_clientes.csv', index=False)
+    print("Clientes por segmento:\n", segmentos['segmento'].value_counts(), "\n")
@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+
+# %% Configurações
+
+ARQUIVOS = {
+    'agencias': 'agencias_processado.csv',
+    'clientes': 'clientes_processado.csv',
+    'colaboradores': 'colaboradores_processado.csv',
+    'contas': 'contas_sem_inconsistencias.csv',
+    'propostas': 'propostas_credito_sem_inconsistencias.csv',
+    'transacoes': 'transacoes_sem_inconsistencias.csv',
+}
+ARQUIVO_MANIFESTO = 'manifesto_execucao.json'  # Gravado por pipeline.py ao fim de cada execução
+INTERVALO_RECARGA = 5  # Segundos entre verificações de novos arquivos do pipeline
+TAMANHO_CACHE = 1024  # Número máximo de respostas mantidas no cache LRU
+
+# Mesmas faixas etárias da seção 3.6 de analise_dados.py
+BINS_IDADE = [0, 20, 30, 40, 50, 60, 100]
+LABELS_IDADE = ['0-20', '21-30', '31-40', '41-50', '51-60', '61+']
+
+# %% Carregamento e pré-agregação
+
+# Identifica a versão dos dados. Com o manifesto de pipeline.py, a versão é o conjunto de hashes das saídas,
+# que só é gravado ao fim de uma execução completa; sem ele, usa tamanho e data de modificação dos arquivos
+def versao_arquivos(diretorio):
+    caminho_manifesto = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    if os.path.exists(caminho_manifesto):
+        with open(caminho_manifesto, encoding='utf-8') as f:
+            manifesto = json.load(f)
+        return tuple(sorted((arquivo, descricao['sha256'])
+                            for etapa in manifesto['etapas'].values()
+                            for arquivo, descricao in etapa['saida'].items()))
+    versao = []
+    for arquivo in ARQUIVOS.values():
+        info = os.stat(os.path.join(diretorio, arquivo))
+        versao.append((arquivo, info.st_size, info.st_mtime_ns))
+    return tuple(versao)
+
+# Snapshot imutável dos dados: as tabelas são pré-agregadas e indexadas pelas dimensões de filtro,
+# de forma que cada consulta percorre apenas alguns milhares de linhas
+class Dados:
+    def __init__(self, diretorio):
+        self.versao = versao_arquivos(diretorio)
+        ler = lambda nome: pd.read_csv(os.path.join(diretorio, ARQUIVOS[nome]))
+        agencias = ler('agencias')[['cod_agencia', 'uf', 'tipo_agencia']]
+        clientes = ler('clientes')
+        contas = ler('contas').merge(agencias, on='cod_agencia', how='left')
+        # A agência de uma proposta é a do colaborador responsável
+        colaboradores = ler('colaboradores')[['cod_colaborador', 'cod_agencia']].merge(agencias, on='cod_agencia')
+        propostas = ler('propostas').merge(colaboradores[['cod_colaborador', 'uf', 'tipo_agencia']],
+                                           on='cod_colaborador', how='left')
+        transacoes = ler('transacoes').merge(contas[['num_conta', 'cod_cliente', 'uf', 'tipo_agencia']],
+                                             on='num_conta', how='left')
+
+        # Volumes mensais por mês, UF, tipo de agência e tipo de transação
+        self.transacoes_mensais = transacoes.groupby(
+            ['data_transacao', 'uf', 'tipo_agencia', 'categoria_transacao', 'nome_transacao']
+        ).agg(
+            num_transacoes=('valor_transacao_abs', 'count'),
+            volume_total=('valor_transacao_abs', 'sum')
+        ).sort_index()
+
+        # Propostas por mês, UF, tipo de agência e status
+        self.propostas_mensais = propostas.groupby(['data_entrada_proposta', 'uf', 'tipo_agencia', 'status_proposta']).agg(
+            num_propostas=('cod_proposta', 'count'),
+            valor_proposta=('valor_proposta', 'sum')
+        ).sort_index()
+
+        # Contas por UF, tipo de agência e tipo de conta
+        self.contas_agg = contas.groupby(['uf', 'tipo_agencia', 'tipo_conta']).agg(
+            num_contas=('num_conta', 'count'),
+            saldo_total=('saldo_total', 'sum'),
+            saldo_disponivel=('saldo_disponivel', 'sum')
+        ).sort_index()
+
+        # Indicadores por cliente, mês, UF e tipo de agência, com a faixa etária já calculada
+        clientes['faixa_idade'] = pd.cut(clientes['idade'], bins=BINS_IDADE, labels=LABELS_IDADE, right=False).astype(str)
+        self.clientes_mensais = transacoes.merge(clientes[['cod_cliente', 'faixa_idade']], on='cod_cliente', how='inner') \
+            .groupby(['data_transacao', 'uf', 'tipo_agencia', 'faixa_idade', 'cod_cliente']).agg(
+                num_transacoes=('valor_transacao_abs', 'count'),
+                volume_total=('valor_transacao_abs', 'sum')
+            ).sort_index()
+
+# %% Consultas
+
+# Filtra um DataFrame com índice multinível ordenado; 'inicio'/'fim' restringem o primeiro nível (mês 'AAAA-MM').
+# A seleção é feita por busca binária no índice (pd.IndexSlice), sem percorrer todas as linhas.
+def filtrar(df, filtros, inicio=None, fim=None):
+    chave = [slice(None)] * df.index.nlevels
+    if inicio or fim:
+        chave[0] = slice(inicio or None, fim or None)
+    for nivel, valor in filtros.items():
+        if valor is not None:
+            chave[df.index.names.index(nivel)] = [valor]  # Lista, para manter o nível no resultado
+    try:
+        return df.loc[pd.IndexSlice[tuple(chave)], :]
+    except KeyError:
+        return df.iloc[:0]  # Valor de filtro inexistente
+
+def volumes_mensais(dados, inicio=None, fim=None, uf=None, tipo_agencia=None, categoria=None, nome_transacao=None):
+    df = filtrar(dados.transacoes_mensais, {'uf': uf, 'tipo_agencia': tipo_agencia,
+                                            'categoria_transacao': categoria, 'nome_transacao': nome_transacao},
+                 inicio, fim)
+    return df.groupby(level='data_transacao').sum().reset_index()
+
+def taxa_aprovacao(dados, inicio=None, fim=None, uf=None, tipo_agencia=None):
+    df = filtrar(dados.propostas_mensais, {'uf': uf, 'tipo_agencia': tipo_agencia}, inicio, fim)
+    por_mes = df['num_propostas'].groupby(level=['data_entrada_proposta', 'status_proposta']).sum() \
+        .unstack('status_proposta', fill_value=0)
+    aprovadas = por_mes.get('Aprovada', 0)
+    resultado = pd.DataFrame({
+        'total_propostas': por_mes.sum(axis=1),
+        'propostas_aprovadas': aprovadas,
+    })
+    resultado['taxa_aprovacao'] = resultado['propostas_aprovadas'] / resultado['total_propostas'] * 100
+    total = resultado[['total_propostas', 'propostas_aprovadas']].sum()
+    return {
+        'taxa_aprovacao': float(total['propostas_aprovadas'] / total['total_propostas'] * 100) if total['total_propostas'] else None,
+        'mensal': resultado.reset_index(),
+    }
+
+def contas(dados, por='uf', uf=None, tipo_agencia=None, tipo_conta=None):
+    if por not in ('uf', 'tipo_agencia', 'tipo_conta'):
+        raise ValueError("O parâmetro 'por' deve ser 'uf', 'tipo_agencia' ou 'tipo_conta'")
+    df = filtrar(dados.contas_agg, {'uf': uf, 'tipo_agencia': tipo_agencia, 'tipo_conta': tipo_conta})
+    return df.groupby(level=por).sum().reset_index()
+
+def faixas_idade(dados, inicio=None, fim=None, uf=None, tipo_agencia=None):
+    df = filtrar(dados.clientes_mensais, {'uf': uf, 'tipo_agencia': tipo_agencia}, inicio, fim)
+    por_cliente = df.groupby(level=['faixa_idade', 'cod_cliente']).sum()
+    return por_cliente.groupby(level='faixa_idade').agg(
+        num_clientes=('volume_total', 'count'),
+        total_volume_mean=('volume_total', 'mean'),
+        total_transactions_sum=('num_transacoes', 'sum')
+    ).reset_index()
+
+ENDPOINTS = {
+    '/volumes_mensais': volumes_mensais,
+    '/taxa_aprovacao': taxa_aprovacao,
+    '/contas': contas,
+    '/faixas_idade': faixas_idade,
+}
+
+# %% Estado do serviço e cache
+
+# Converte o resultado de uma consulta em uma estrutura serializável em JSON
+def para_json(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        return json.loads(resultado.to_json(orient='records'))
+    if isinstance(resultado, dict):
+        return {chave: para_json(valor) for chave, valor in resultado.items()}
+    return resultado
+
+def consultar(dados, caminho, parametros):
+    return json.dumps(para_json(ENDPOINTS[caminho](dados, **dict(parametros))), ensure_ascii=False).encode('utf-8')
+
+class Servico:
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.dados = Dados(diretorio)
+        self.trava_recarga = threading.Lock()
+        # Cache LRU das respostas, com chave (versão dos dados, endpoint, parâmetros). Guarda apenas bytes,
+        # nunca uma referência ao snapshot, para que um snapshot substituído possa ser liberado da memória.
+        self.cache = OrderedDict()
+        self.trava_cache = threading.Lock()
+
+    def consultar(self, caminho, parametros):
+        # Leitura única da referência: a consulta inteira usa o mesmo snapshot, mesmo durante uma recarga
+        dados = self.dados
+        chave = (dados.versao, caminho, tuple(sorted(parametros.items())))
+        with self.trava_cache:
+            if chave in self.cache:
+                self.cache.move_to_end(chave)
+                return self.cache[chave]
+        resposta = consultar(dados, caminho, chave[2])
+        with self.trava_cache:
+            # Uma consulta que terminou depois de uma recarga não repõe no cache respostas do snapshot antigo
+            if dados is self.dados:
+                self.cache[chave] = resposta
+                if len(self.cache) > TAMANHO_CACHE:
+                    self.cache.popitem(last=False)
+        return resposta
+
+    # Carrega o novo snapshot por completo antes de substituir a referência, de forma atômica
+    def recarregar_se_necessario(self):
+        with self.trava_recarga:
+            try:
+                if versao_arquivos(self.diretorio) == self.dados.versao:
+                    return False
+                novos_dados = Dados(self.diretorio)
+            except (FileNotFoundError, json.JSONDecodeError, pd.errors.ParserError, pd.errors.EmptyDataError) as erro:
+                # Execução do pipeline ainda em andamento: mantém os dados atuais e tenta novamente depois
+                print(f"Recarga adiada: {erro}")
+                return False
+            with self.trava_cache:
+                self.dados = novos_dados
+                self.cache.clear()
+            return True
+
+    def monitorar(self, intervalo=INTERVALO_RECARGA):
+        while True:
+            time.sleep(intervalo)
+            if self.recarregar_se_necessario():
+                print("Dados recarregados")
+
+# %% Servidor HTTP
+
+def criar_handler(servico):
+    class Handler(BaseHTTPRequestHandler):
+        def responder(self, status, corpo):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/saude':
+                self.responder(200, json.dumps({'versao': servico.dados.versao}).encode('utf-8'))
+                return
+            if url.path not in ENDPOINTS:
+                self.responder(404, json.dumps({'erro': f'Endpoint desconhecido: {url.path}'}).encode('utf-8'))
+                return
+            parametros = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+            try:
+                self.responder(200, servico.consultar(url.path, parametros))
+            except (TypeError, ValueError) as erro:
+                self.responder(400, json.dumps({'erro': str(erro)}, ensure_ascii=False).encode('utf-8'))
+            except Exception as erro:
+                traceback.print_exc()
+                self.responder(500, json.dumps({'erro': f'Erro interno: {erro}'}, ensure_ascii=False).encode('utf-8'))
+
+        def log_message(self, format, *args):
+            pass  # Evita uma linha de log por requisição durante testes de carga
+
+    return Handler
+
+# %% Execução
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serviço HTTP/JSON de indicadores sobre as tabelas processadas.')
+    parser.add_argument('--diretorio', default='.', help='Diretório com os arquivos gerados pelo pipeline')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8050)
+    args = parser.parse_args()
+
+    servico = Servico(args.diretorio)
+    threading.Thread(target=servico.monitorar, daemon=True).start()
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_handler(servico))
+    print(f"Servindo indicadores em http://{args.host}:{args.porta} ({', '.join(ENDPOINTS)})")
+    servidor.serve_forever()
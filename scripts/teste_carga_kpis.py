@@ -0,0 +1,60 @@
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from urllib.request import urlopen
+from urllib.error import HTTPError
+import numpy as np
+
+# %% Consultas de exemplo (misturam filtros repetidos, atendidos pelo cache, e combinações novas)
+
+MESES = [f'{ano}-{mes:02d}' for ano in range(2010, 2023) for mes in range(1, 13)]
+UFS = ['SP', 'RJ', 'RS', 'SC', 'PE']
+TIPOS_AGENCIA = ['Física', 'Digital']
+
+def gerar_consulta(rng):
+    inicio, fim = sorted(rng.sample(MESES, 2))
+    caminho, parametros = rng.choice([
+        ('/volumes_mensais', {'inicio': inicio, 'fim': fim}),
+        ('/volumes_mensais', {'uf': rng.choice(UFS), 'categoria': rng.choice(['Entrada', 'Saída'])}),
+        ('/taxa_aprovacao', {'inicio': inicio, 'fim': fim, 'uf': rng.choice(UFS)}),
+        ('/contas', {'por': rng.choice(['uf', 'tipo_agencia'])}),
+        ('/faixas_idade', {'tipo_agencia': rng.choice(TIPOS_AGENCIA), 'inicio': inicio}),
+    ])
+    return f'{caminho}?{urlencode(parametros)}'
+
+# Executa uma requisição e retorna a latência em milissegundos
+def requisitar(url):
+    inicio = time.perf_counter()
+    try:
+        with urlopen(url) as resposta:
+            resposta.read()
+            status = resposta.status
+    except HTTPError as erro:
+        status = erro.code
+    return (time.perf_counter() - inicio) * 1000, status
+
+# %% Execução
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Teste de carga do serviço de indicadores (servico_kpis.py).')
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semente)
+    urls = [args.url + gerar_consulta(rng) for _ in range(args.requisicoes)]
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        resultados = list(executor.map(requisitar, urls))
+    duracao = time.perf_counter() - inicio
+
+    latencias = np.array([latencia for latencia, _ in resultados])
+    erros = sum(status != 200 for _, status in resultados)
+    print(f"Requisições: {len(resultados)} ({erros} com erro) em {duracao:.2f} s ({len(resultados) / duracao:.0f} req/s)")
+    print(f"Latência p50: {np.percentile(latencias, 50):.2f} ms")
+    print(f"Latência p99: {np.percentile(latencias, 99):.2f} ms")
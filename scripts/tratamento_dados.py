@@ -1,16 +1,20 @@
 import pandas as pd
 import re
-from datetime import datetime
+from contexto_execucao import contexto_atual
+from ingestao import ler_csv
 
 # %%  Leitura dos arquivos
+# A leitura valida colunas e tipos e já converte as datas 'AAAA-MM-DD HH:MM:SS UTC' (ver ingestao.py)
 
-agencias = pd.read_csv('agencias.csv')
-clientes = pd.read_csv('clientes.csv')
-colaborador_agencia = pd.read_csv('colaborador_agencia.csv')
-colaboradores = pd.read_csv('colaboradores.csv')
-contas = pd.read_csv('contas.csv')
-propostas_credito = pd.read_csv('propostas_credito.csv')
-transacoes = pd.read_csv('transacoes.csv')
+contexto = contexto_atual()  # Data de referência e diretórios de entrada/saída (ver contexto_execucao.py)
+
+agencias = ler_csv('agencias', contexto.dir_entrada, contexto.dir_saida)
+clientes = ler_csv('clientes', contexto.dir_entrada, contexto.dir_saida)
+colaborador_agencia = ler_csv('colaborador_agencia', contexto.dir_entrada, contexto.dir_saida)
+colaboradores = ler_csv('colaboradores', contexto.dir_entrada, contexto.dir_saida)
+contas = ler_csv('contas', contexto.dir_entrada, contexto.dir_saida)
+propostas_credito = ler_csv('propostas_credito', contexto.dir_entrada, contexto.dir_saida)
+transacoes = ler_csv('transacoes', contexto.dir_entrada, contexto.dir_saida)
 
 # %% Funções
 
@@ -20,21 +24,17 @@ def format_cep(cep):
     cep = re.sub(r'\D', '', cep)  # Remove caracteres não numéricos
     return f"{cep[:5]}-{cep[5:]}" if len(cep) == 8 else None
 
-# Calcula a idade de forma precisa considerando ano, mês e dia
-def calcular_idade(data_nascimento):
-    if pd.notna(data_nascimento):
-        nascimento = pd.to_datetime(data_nascimento, errors='coerce')
-        if pd.notna(nascimento):
-            hoje = datetime.now()
-            idade = hoje.year - nascimento.year - ((hoje.month, hoje.day) < (nascimento.month, nascimento.day))
-            return idade
-    return None
+# Calcula a idade de forma precisa considerando ano, mês e dia, em relação à data de referência da execução
+def calcular_idade(datas_nascimento, data_referencia):
+    nascimento = pd.to_datetime(datas_nascimento, errors='coerce')
+    ainda_nao_fez_aniversario = (nascimento.dt.month > data_referencia.month) | (
+        (nascimento.dt.month == data_referencia.month) & (nascimento.dt.day > data_referencia.day))
+    idade = data_referencia.year - nascimento.dt.year - ainda_nao_fez_aniversario.astype(int)
+    return idade.astype('Int64')
 
-# Extrai o ano e mês de uma data
-def extrair_ano_mes(data):
-    if pd.notna(data):
-        return pd.to_datetime(data, errors='coerce').strftime('%Y-%m')
-    return None
+# Extrai o ano e mês de uma coluna de datas já convertida na leitura
+def extrair_ano_mes(datas):
+    return datas.dt.strftime('%Y-%m')
 
 # Exibe o número de valores nulos em cada coluna de um DataFrame
 def checar_valores_nulos(df, nome_df):
@@ -54,53 +54,53 @@ def extrair_cep_endereco(endereco):
 
 agencias['cep'] = agencias['endereco'].apply(extrair_cep_endereco) # Extrai o CEP do campo 'endereco' e cria a coluna 'cep'
 agencias.drop(columns=['endereco'], inplace=True) # Remove a coluna 'endereco'
-agencias.to_csv('agencias_processado.csv', index=False) # Salva o DataFrame processado em um novo arquivo CSV
-agencias_processado = pd.read_csv('agencias_processado.csv') # Lê o arquivo processado
+agencias.to_csv(contexto.saida('agencias_processado.csv'), index=False) # Salva o DataFrame processado em um novo arquivo CSV
+agencias_processado = pd.read_csv(contexto.saida('agencias_processado.csv')) # Lê o arquivo processado
 checar_valores_nulos(agencias_processado, 'agencias_processado') # Verifica se há valores nulos
 
 # %% Processamento de clientes.csv
 
-clientes['ano_mes_inclusao'] = clientes['data_inclusao'].apply(extrair_ano_mes) # Extrai ano e mês da data de inclusão e armazena em uma nova coluna
-clientes['idade'] = clientes['data_nascimento'].apply(calcular_idade) # Calcula a idade com base na data de nascimento
+clientes['ano_mes_inclusao'] = extrair_ano_mes(clientes['data_inclusao']) # Extrai ano e mês da data de inclusão e armazena em uma nova coluna
+clientes['idade'] = calcular_idade(clientes['data_nascimento'], contexto.data_referencia) # Calcula a idade com base na data de nascimento
 clientes['cep'] = clientes['cep'].apply(format_cep) # Formata o CEP para o padrão 'XXXXX-XXX'
 clientes.drop(columns=['data_inclusao', 'data_nascimento', 'endereco', 'cpfcnpj', 'email'], inplace=True) # Remove colunas desnecessárias após o processamento
 clientes.rename(columns={'ano_mes_inclusao': 'data_inclusao'}, inplace=True) # Renomeia a coluna 'ano_mes_inclusao' para 'data_inclusao'
-clientes.to_csv('clientes_processado.csv', index=False)
-clientes_processado = pd.read_csv('clientes_processado.csv')
+clientes.to_csv(contexto.saida('clientes_processado.csv'), index=False)
+clientes_processado = pd.read_csv(contexto.saida('clientes_processado.csv'))
 checar_valores_nulos(clientes_processado, 'clientes_processado')
 
 # %% Processamento de colaboradores.csv
 
 colaboradores = colaboradores.merge(colaborador_agencia[['cod_colaborador', 'cod_agencia']], on='cod_colaborador', how='left') # Realiza o merge para associar cada colaborador à sua agência
-colaboradores['idade'] = colaboradores['data_nascimento'].apply(calcular_idade)
+colaboradores['idade'] = calcular_idade(colaboradores['data_nascimento'], contexto.data_referencia)
 colaboradores['cep'] = colaboradores['cep'].apply(format_cep)
 colaboradores.drop(columns=['data_nascimento', 'endereco', 'cpf', 'email'], inplace=True)
-colaboradores.to_csv('colaboradores_processado.csv', index=False)
-colaboradores_processado = pd.read_csv('colaboradores_processado.csv')
+colaboradores.to_csv(contexto.saida('colaboradores_processado.csv'), index=False)
+colaboradores_processado = pd.read_csv(contexto.saida('colaboradores_processado.csv'))
 checar_valores_nulos(colaboradores_processado, 'colaboradores_processado')
 
 # %% Processamento de contas.csv
 
-contas['ano_mes_abertura'] = contas['data_abertura'].apply(extrair_ano_mes)
-contas['ano_mes_ultimo_lancamento'] = contas['data_ultimo_lancamento'].apply(extrair_ano_mes)
+contas['ano_mes_abertura'] = extrair_ano_mes(contas['data_abertura'])
+contas['ano_mes_ultimo_lancamento'] = extrair_ano_mes(contas['data_ultimo_lancamento'])
 contas.drop(columns=['data_abertura', 'data_ultimo_lancamento'], inplace=True)
 contas.rename(columns={'ano_mes_abertura': 'data_abertura', 'ano_mes_ultimo_lancamento': 'data_ultimo_lancamento'}, inplace=True)
-contas.to_csv('contas_processado.csv', index=False)
-contas_processado = pd.read_csv('contas_processado.csv')
+contas.to_csv(contexto.saida('contas_processado.csv'), index=False)
+contas_processado = pd.read_csv(contexto.saida('contas_processado.csv'))
 checar_valores_nulos(contas_processado, 'contas_processado')
 
 # %% Processamento de propostas_credito.csv
 
-propostas_credito['ano_mes_entrada_proposta'] = propostas_credito['data_entrada_proposta'].apply(extrair_ano_mes)
+propostas_credito['ano_mes_entrada_proposta'] = extrair_ano_mes(propostas_credito['data_entrada_proposta'])
 propostas_credito.drop(columns=['data_entrada_proposta'], inplace=True)
 propostas_credito.rename(columns={'ano_mes_entrada_proposta': 'data_entrada_proposta'}, inplace=True)
-propostas_credito.to_csv('propostas_credito_processado.csv', index=False)
-propostas_credito_processado = pd.read_csv('propostas_credito_processado.csv')
+propostas_credito.to_csv(contexto.saida('propostas_credito_processado.csv'), index=False)
+propostas_credito_processado = pd.read_csv(contexto.saida('propostas_credito_processado.csv'))
 checar_valores_nulos(propostas_credito_processado, 'propostas_credito_processado')
 
 # %% Processamento de transacoes.csv
 
-transacoes['ano_mes_transacao'] = transacoes['data_transacao'].apply(extrair_ano_mes)
+transacoes['ano_mes_transacao'] = extrair_ano_mes(transacoes['data_transacao'])
 transacoes['valor_transacao_abs'] = transacoes['valor_transacao'].abs() # Cria uma coluna com o valor absoluto da transação
 
 # %% Classificação de nome_transacao
@@ -146,6 +146,6 @@ transacoes['categoria_transacao'] = transacoes['nome_transacao'].apply(categoriz
 
 transacoes.drop(columns=['data_transacao', 'nome_transacao'], inplace=True)
 transacoes.rename(columns={'ano_mes_transacao': 'data_transacao', 'transacao_simplificada':'nome_transacao'}, inplace=True)
-transacoes.to_csv('transacoes_processado.csv', index=False)
-transacoes_processado = pd.read_csv('transacoes_processado.csv')
+transacoes.to_csv(contexto.saida('transacoes_processado.csv'), index=False)
+transacoes_processado = pd.read_csv(contexto.saida('transacoes_processado.csv'))
 checar_valores_nulos(transacoes_processado, 'transacoes_processado')